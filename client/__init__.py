@@ -0,0 +1 @@
+# client/__init__.py
@@ -0,0 +1,5 @@
+# client/__main__.py
+# Entry point for `python -m client` and the PyInstaller build
+from client.main import main
+
+main()
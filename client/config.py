@@ -5,11 +5,26 @@ from .utils import resource_path  # Import from local utils module
 # Remember to change if server address changes
 SERVER_ADDRESS = "192.168.41.108:50051"
 FPS = 60
+# Pace frames on the display's vertical sync when available. FPS then no longer
+# throttles; MAX_FPS only stops a runaway loop if the driver ignores vsync.
+VSYNC = True
+MAX_FPS = 240
+# Flips timed at startup to confirm vsync really waits for the display; if they
+# return faster than MAX_FPS the client falls back to capping at FPS
+VSYNC_PROBE_FLIPS = 5
 
 # Screen
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 BACKGROUND_COLOR = (0, 0, 50)
+# Maps up to this many pixels are pre-rendered to one Surface (~64 MB at 32bpp)
+MAP_PREBAKE_MAX_PIXELS = 4096 * 4096
+# Larger maps are pre-rendered in square chunks of this many tiles per side,
+# keeping up to MAP_CHUNK_CACHE_SIZE of them (~1 MB each at 32px tiles)
+MAP_CHUNK_TILES = 16
+MAP_CHUNK_CACHE_SIZE = 64
+# Rendered player-name surfaces kept by the Renderer (least recently used evicted)
+USERNAME_CACHE_SIZE = 256
 
 # Assets (using resource_path)
 SPRITE_SHEET_PATH = resource_path("assets/player_sheet_256.png")
@@ -20,6 +35,10 @@ FONT_PATH = resource_path("fonts/DejaVuSansMono.ttf")
 # Game Mechanics
 FRAME_WIDTH = 128
 FRAME_HEIGHT = 128
+# Longest time (seconds) a remote player takes to glide to a new server position
+INTERPOLATION_MAX_INTERVAL = 0.1
+# Player slots pre-allocated by the state manager (doubles if exceeded)
+PLAYER_SLOT_CAPACITY = 256
 
 # Chat UI
 MAX_CHAT_HISTORY = 7
@@ -35,6 +54,7 @@ CHAT_INPUT_BOX_COLOR_ACTIVE = (50, 50, 100)
 CHAT_INPUT_BOX_COLOR_INACTIVE = (30, 30, 60)  # Slightly darker when inactive
 CHAT_INPUT_BORDER_COLOR_ACTIVE = (150, 150, 255)
 CHAT_HISTORY_BG_COLOR = (0, 0, 0, 150)  # Semi-transparent black
+CHAT_TEXT_CACHE_SIZE = 256  # Rendered chat text surfaces kept (LRU)
 
 # Player Colors (Can also be here or loaded from elsewhere)
 AVAILABLE_COLORS = [
@@ -10,6 +10,14 @@ class InputHandler:
     def __init__(self):
         self.current_direction = game_pb2.PlayerInput.Direction.UNKNOWN
         self.quit_requested = False
+        # Checked in order, first pressed key wins (so up beats down beats left...)
+        direction = game_pb2.PlayerInput.Direction
+        self._key_map = (
+            (pygame.K_w, direction.UP), (pygame.K_UP, direction.UP),
+            (pygame.K_s, direction.DOWN), (pygame.K_DOWN, direction.DOWN),
+            (pygame.K_a, direction.LEFT), (pygame.K_LEFT, direction.LEFT),
+            (pygame.K_d, direction.RIGHT), (pygame.K_RIGHT, direction.RIGHT),
+        )
 
     def handle_movement_input(self) -> game_pb2.PlayerInput.Direction:
         """
@@ -18,19 +26,15 @@ class InputHandler:
         """
         # Reset quit request flag when checking movement, assuming quit check is separate
         # self.quit_requested = False
-        new_direction = game_pb2.PlayerInput.Direction.UNKNOWN
-
         # Use get_pressed for continuous movement checks
         keys_pressed = pygame.key.get_pressed()
 
-        if keys_pressed[pygame.K_w] or keys_pressed[pygame.K_UP]:
-            new_direction = game_pb2.PlayerInput.Direction.UP
-        elif keys_pressed[pygame.K_s] or keys_pressed[pygame.K_DOWN]:
-            new_direction = game_pb2.PlayerInput.Direction.DOWN
-        elif keys_pressed[pygame.K_a] or keys_pressed[pygame.K_LEFT]:
-            new_direction = game_pb2.PlayerInput.Direction.LEFT
-        elif keys_pressed[pygame.K_d] or keys_pressed[pygame.K_RIGHT]:
-            new_direction = game_pb2.PlayerInput.Direction.RIGHT
+        for key, direction in self._key_map:
+            if keys_pressed[key]:
+                new_direction = direction
+                break
+        else:
+            new_direction = game_pb2.PlayerInput.Direction.UNKNOWN
 
         # Update internal state only if direction changed
         if self.current_direction != new_direction:
@@ -43,10 +47,10 @@ class InputHandler:
         Checks the event queue *only* for the QUIT event (window close).
         Sets the internal quit_requested flag if found.
         Returns True if QUIT was found, False otherwise.
-        Call this once per frame in the main loop.
+        The main loop handles QUIT in its own single event pass; this only peeks,
+        so it never takes events away from that pass.
         """
-        # Important: This consumes QUIT events from the queue
-        for event in pygame.event.get(eventtype=pygame.QUIT):
+        if pygame.event.peek(pygame.QUIT):
             self.quit_requested = True
             return True
         return False
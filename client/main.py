@@ -1,4 +1,7 @@
 # client/main.py
+import os
+# Use the compiled upb protobuf backend; must be set before protobuf is imported
+os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
 from . import (
     config,
     state,
@@ -7,21 +10,31 @@ from . import (
     ui
 )
 from . import config
-import queue
-import traceback
-import time
+import logging
+import math
 import sys
 import pygame
 print("Client main.py: Starting up...")
 
 try:
     from gen.python import game_pb2
+    from google.protobuf.internal import api_implementation
+    print(f"Client main.py: Protobuf implementation: {api_implementation.Type()}")
+    if api_implementation.Type() == "python":
+        # Still works, but decoding every server message in Python is many times slower
+        print("WARNING: protobuf is using the pure-Python implementation. Install the "
+              "protobuf wheel from requirements.txt (protobuf>=4 ships upb).")
 except ModuleNotFoundError as e:
     print(
         f"main.py: Error importing generated code. Did you run 'protoc' and create gen/__init__.py / gen/python/__init__.py? Error: {e}")
     game_pb2 = None  # Allow limited continuation if only used for type hints
     sys.exit(1)
 
+log = logging.getLogger(__name__)
+
+# Characters allowed in a username besides letters and digits
+_USERNAME_PUNCTUATION = frozenset(('_', '-'))
+
 
 class GameClient:
     """Main game client class orchestrating all components."""
@@ -34,90 +47,114 @@ class GameClient:
         self.renderer = ui.Renderer(config.SCREEN_WIDTH, config.SCREEN_HEIGHT)
         self.input_handler = input.InputHandler()
         self.chat_manager = ui.ChatManager()  # Instantiate ChatManager
-        self.clock = pygame.time.Clock()
-        self.server_message_queue = queue.Queue()  # Queue for messages from network thread
         self.network_handler = network.NetworkHandler(
-            config.SERVER_ADDRESS, self.state_manager, self.server_message_queue)
+            config.SERVER_ADDRESS, self.state_manager)
         self.running = False
         self.username = ""
+        # Username screen fonts and static text, built once
+        self._input_font = pygame.font.SysFont(None, 35)
+        self._prompt_surf = pygame.font.SysFont(None, 40).render(
+            "Enter Username:", True, (200, 200, 255))
+        self._prompt_rect = self._prompt_surf.get_rect(
+            center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2-50))
+        self._instr_surf = self._input_font.render(
+            "(Press Enter to join, Esc to quit)", True, (150, 150, 150))
+        self._instr_rect = self._instr_surf.get_rect(
+            center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2+50))
+        # Queue message type -> handler, resolved once. Map and delta updates are
+        # applied by the network handler's state thread, not here.
+        self._msg_dispatch = {
+            "chat": self.chat_manager.add_message,
+        }
         print("GameClient Initialized.")
 
     def get_username_input(self):
         """Displays a simple screen to input username."""
         # This UI is basic, consider a dedicated UI framework for more complex input
         input_active = True
-        input_text = ""
-        # Use fonts loaded by Renderer or ChatManager if needed, or load here
-        prompt_font = pygame.font.SysFont(None, 40)
-        input_font = pygame.font.SysFont(None, 35)
-        prompt_surf = prompt_font.render(
-            "Enter Username:", True, (200, 200, 255))
-        prompt_rect = prompt_surf.get_rect(
-            center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2-50))
-        instr_surf = input_font.render(
-            "(Press Enter to join, Esc to quit)", True, (150, 150, 150))
-        instr_rect = instr_surf.get_rect(
-            center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2+50))
+        input_chars = []  # Typed characters; joined only when rendering or returning
+        input_font = self._input_font
+        prompt_surf, prompt_rect = self._prompt_surf, self._prompt_rect
+        instr_surf, instr_rect = self._instr_surf, self._instr_rect
 
+        # Band the input box can occupy; only this is repainted while typing
+        input_band = pygame.Rect(
+            0, config.SCREEN_HEIGHT//2-30, config.SCREEN_WIDTH, 60)
+        full_redraw = True
+        text_changed = True  # Renders the (empty) input on the first pass
+        input_surf = input_rect = None
+        screen = self.renderer.screen
         while input_active:
-            for event in pygame.event.get():
+            # Drawing for input screen: full repaint once, then just the input band.
+            # Painted before waiting, so the screen shows even with no event queued
+            if full_redraw or text_changed:
+                if text_changed:  # An expose alone reuses the baked box
+                    # Bake the box background and text into one surface
+                    text_surf = input_font.render("".join(input_chars), True, (255, 255, 255))
+                    input_surf = pygame.Surface(
+                        text_surf.get_rect().inflate(20, 10).size).convert()
+                    input_surf.fill(config.BACKGROUND_COLOR)  # Behind rounded corners
+                    pygame.draw.rect(input_surf, (50, 50, 100), input_surf.get_rect(),
+                                     border_radius=5)  # Input box bg
+                    input_surf.blit(text_surf, (10, 5))
+                    input_rect = input_surf.get_rect(
+                        center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2))
+                if full_redraw:
+                    screen.fill(config.BACKGROUND_COLOR)
+                    screen.blits(((prompt_surf, prompt_rect), (instr_surf, instr_rect),
+                                  (input_surf, input_rect)), doreturn=False)
+                    pygame.display.flip()
+                else:
+                    screen.fill(config.BACKGROUND_COLOR, input_band)
+                    screen.blit(input_surf, input_rect)
+                    pygame.display.update(input_band)
+            full_redraw = text_changed = False
+
+            # Sleep until something happens, then take whatever else is queued
+            for event in [pygame.event.wait()] + pygame.event.get():
                 if event.type == pygame.QUIT:
                     return None  # Indicate quit
+                if event.type == pygame.WINDOWEXPOSED:
+                    full_redraw = True
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                        if input_text:  # Require non-empty username
+                        if input_chars:  # Require non-empty username
                             input_active = False
                     elif event.key == pygame.K_BACKSPACE:
-                        input_text = input_text[:-1]
+                        if input_chars:
+                            input_chars.pop()
+                            text_changed = True
                     elif event.key == pygame.K_ESCAPE:  # Allow quitting from username screen
                         return None
-                    elif len(input_text) < 16:  # Username length limit
+                    elif len(input_chars) < 16:  # Username length limit
                         # Basic alphanumeric + underscore/dash filter
-                        if event.unicode.isalnum() or event.unicode in ['_', '-']:
-                            input_text += event.unicode
-
-            # Drawing for input screen
-            self.renderer.screen.fill(config.BACKGROUND_COLOR)
-            self.renderer.screen.blit(prompt_surf, prompt_rect)
-            self.renderer.screen.blit(instr_surf, instr_rect)
-            input_surf = input_font.render(input_text, True, (255, 255, 255))
-            input_rect = input_surf.get_rect(
-                center=(config.SCREEN_WIDTH//2, config.SCREEN_HEIGHT//2))
-            pygame.draw.rect(self.renderer.screen, (50, 50, 100), input_rect.inflate(
-                20, 10), border_radius=5)  # Input box bg
-            self.renderer.screen.blit(input_surf, input_rect)
-            pygame.display.flip()
-            self.clock.tick(30)  # Lower FPS for input screen
-
-        return input_text
+                        if event.unicode.isalnum() or event.unicode in _USERNAME_PUNCTUATION:
+                            input_chars.append(event.unicode)
+                            text_changed = True
+
+        return "".join(input_chars)
 
     def _process_server_messages(self):
-        """Processes messages received from the network thread."""
+        """Processes messages received from the network thread.
+
+        Everything received since the last frame is taken in one batch. Only
+        main-thread work (chat) comes through here; map and player updates are
+        applied by the network handler's state thread while this thread renders.
+        """
+        pending = self.network_handler.drain_incoming()
+        if not pending:
+            return
+
+        dispatch = self._msg_dispatch
         try:
-            while True:  # Process all available messages
-                message_type, message_data = self.server_message_queue.get_nowait()
-
-                if message_type == "map_data":
-                    self.state_manager.set_initial_map_data(message_data)
-                    # Update renderer's tile size if needed (Renderer checks internally now)
-                    _, _, _, tile_size = self.state_manager.get_map_data()
-                    if self.renderer.tile_size != tile_size:
-                        print(
-                            f"Client: Updating renderer tile size to {tile_size}")
-                        self.renderer.tile_size = tile_size
-                        # TODO: Potentially trigger re-extraction of tile graphics in renderer here
-                elif message_type == "delta_update":
-                    self.state_manager.apply_delta_update(message_data)
-                elif message_type == "chat":
-                    # Pass received chat message to ChatManager
-                    self.chat_manager.add_message(message_data)
+            for message_type, message_data in pending:
+                handler = dispatch.get(message_type)
+                if handler is not None:
+                    handler(message_data)
                 else:
-                    print(f"Warn: Unknown queue msg type: {message_type}")
-        except queue.Empty:
-            pass  # No more messages for now
-        except Exception as e:
-            print(f"Error processing server message queue: {e}")
-            traceback.print_exc()  # Print full traceback for queue errors
+                    log.warning("Unknown queue msg type: %s", message_type)
+        except Exception:
+            log.exception("Error processing server message queue")  # With traceback
 
     def run(self):
         """Main game loop."""
@@ -133,112 +170,163 @@ class GameClient:
         # --- Start Network and Main Loop ---
         self.running = True
         if not self.network_handler.start():
-            print("Failed to start network handler. Exiting.")
+            log.error("Failed to start network handler. Exiting.")
             self.running = False
-            # Error display loop
+            # Error display loop. The screen is static, so sleep in event.wait()
+            # and repaint only when the window needs it.
+            redraw = True
             while True:
+                if redraw:
+                    render_ok = self.renderer.render_game_world(self.state_manager)
+                    # Optionally draw chat manager's state even on error? Probably not.
+                    # if render_ok: self.chat_manager.draw(self.renderer.screen)
+                    pygame.display.flip()
+                event = pygame.event.wait()
                 # Check only for quit events on error screen
-                quit_event = False
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                        quit_event = True
-                        break
-                if quit_event:
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
                     break  # Exit loop to shutdown
-
-                render_ok = self.renderer.render_game_world(self.state_manager)
-                # Optionally draw chat manager's state even on error? Probably not.
-                # if render_ok: self.chat_manager.draw(self.renderer.screen)
-                pygame.display.flip()
-                self.clock.tick(10)  # Low FPS for error screen
+                redraw = event.type == pygame.WINDOWEXPOSED
             self.shutdown()  # Shutdown after error screen exit
             return
 
-        # Wait briefly for player ID to arrive from server after connection
+        # Wait briefly for player ID to arrive from server after connection. The
+        # state thread signals once the map (which carries the ID) is applied.
         print("Waiting for player ID from server...")
-        wait_start_time = time.time()
-        while self.state_manager.get_my_player_id() is None and self.running:
-            self._process_server_messages()  # Process any initial messages
-            if self.network_handler.stop_event.is_set():  # Check if network thread died
-                print("Network thread stopped while waiting for player ID. Exiting.")
-                self.running = False
-                break
-            if time.time() - wait_start_time > 10:  # Timeout waiting for ID
-                print("Error: Timed out waiting for player ID from server.")
+        map_arrived = self.network_handler.map_data_received.wait(timeout=10.0)
+        if self.state_manager.get_my_player_id() is None:
+            if not map_arrived:  # Timeout waiting for ID
+                log.error("Timed out waiting for player ID from server.")
                 self.state_manager.set_connection_error(
                     "Timeout waiting for player ID.")
-                self.running = False
-                break
-            time.sleep(0.05)  # Small sleep to avoid busy-waiting
+            else:  # Network thread died before the map came
+                log.error("Network thread stopped while waiting for player ID. Exiting.")
+            self.running = False
 
         if not self.running:  # Check if waiting loop exited due to error/timeout
             self.shutdown()
             return
 
         print("Starting main game loop...")
-        # Default direction
-        current_direction = game_pb2.PlayerInput.Direction.UNKNOWN if game_pb2 else 0
+        # Default direction; loop-invariant lookups bound once
+        unknown_direction = game_pb2.PlayerInput.Direction.UNKNOWN if game_pb2 else 0
+        current_direction = unknown_direction
+        sent_direction = unknown_direction  # Last direction handed to the network handler
+        update_input = self.network_handler.update_input_direction
+        event_get, flip = pygame.event.get, pygame.display.flip
+        event_wait, get_ticks = pygame.event.wait, pygame.time.get_ticks
+        # Input, chat and server messages are handled as soon as an event arrives,
+        # and at least every poll_ms for held keys and server state; frames are
+        # drawn at most every render_ms. With vsync, flip() does the real pacing
+        # and render_ms only catches a driver that ignores it.
+        poll_ms = 1000 / config.FPS
+        render_ms = 1000 / (config.MAX_FPS if self.renderer.vsync else config.FPS)
+        next_render = get_ticks()  # Earliest time (ms) the next frame may be drawn
+        woken_by = None  # Event that ended a wait; handled first next pass
+        stop_event = self.network_handler.stop_event
+        chat_active = self.chat_manager.is_active
+        read_movement = self.input_handler.handle_movement_input
+        process_messages = self._process_server_messages
+        render_world = self.renderer.render_game_world
+        draw_chat = self.chat_manager.draw
+        chat_needs_redraw = self.chat_manager.needs_redraw
+        renderer, screen, state_manager = self.renderer, self.renderer.screen, self.state_manager
+        get_version = state_manager.get_version
+        drawn_version = None  # State version on screen; None forces the first frame
+        # Only these event types reach the queue from here on; everything else
+        # (mouse motion, most window events...) is dropped by SDL before it becomes
+        # a Python object. TEXTINPUT stays allowed because pygame fills KEYDOWN's
+        # unicode from it. Held keys are still read via key.get_pressed().
+        game_events = (pygame.QUIT, pygame.KEYDOWN, pygame.TEXTINPUT, pygame.WINDOWEXPOSED)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(game_events)
         while self.running:
             # --- Check for Stop Signals ---
-            if self.network_handler.stop_event.is_set():
-                print("Stop event detected from network thread. Exiting loop.")
-                self.running = False
-                continue
-            if self.input_handler.check_quit_event():  # Check for window close
+            if stop_event.is_set():
+                log.warning("Stop event detected from network thread. Exiting loop.")
                 self.running = False
                 continue
 
-            # --- Process Events (Keyboard, etc.) ---
-            message_to_send = None
-            for event in pygame.event.get():  # Iterate through other events
+            pass_start = get_ticks()
+            # --- Process Events (Keyboard, window close) in one pass ---
+            messages_to_send = []  # Every chat line entered this frame, in order
+            events = event_get(game_events)
+            if woken_by is not None:
+                events.insert(0, woken_by)
+                woken_by = None
+            for event in events:
+                if event.type == pygame.QUIT:  # Window close
+                    self.running = False
+                    break
+                if event.type == pygame.WINDOWEXPOSED:
+                    drawn_version = None  # Window contents lost; repaint
                 if event.type == pygame.KEYDOWN:
                     # Global ESC: Close chat if active, else quit game
                     if event.key == pygame.K_ESCAPE:
-                        if self.chat_manager.is_active():
+                        if chat_active():
                             self.chat_manager.toggle_active()  # Close chat
                         else:
                             self.running = False
                             break  # Quit game
                     # Chat Toggle 'T'
-                    elif event.key == pygame.K_t and not self.chat_manager.is_active():
+                    elif event.key == pygame.K_t and not chat_active():
                         self.chat_manager.toggle_active()
                     # Pass other keydown events to ChatManager if it's active
-                    elif self.chat_manager.is_active():
-                        message_to_send = self.chat_manager.handle_input_event(
-                            event)
-                # Handle other event types here if needed (e.g., MOUSEBUTTONDOWN)
+                    elif chat_active():
+                        message = self.chat_manager.handle_input_event(event)
+                        if message:
+                            messages_to_send.append(message)
+                # Handle other event types here if needed (allow them above first)
 
             if not self.running:
-                continue  # Check if ESC quit loop
+                continue  # Check if ESC or window close quit loop
 
             # --- Handle Movement / Update Network Input ---
-            if not self.chat_manager.is_active():
+            if not chat_active():
                 # Get movement direction from InputHandler (checks get_pressed)
-                current_direction = self.input_handler.handle_movement_input()
-                self.network_handler.update_input_direction(current_direction)
+                current_direction = read_movement()
             else:
                 # Ensure player stops moving when chat is active
-                self.network_handler.update_input_direction(
-                    game_pb2.PlayerInput.Direction.UNKNOWN if game_pb2 else 0)
+                current_direction = unknown_direction
+            # Only cross to the network thread on a change; it repeats held input.
+            # A change it could not queue yet (stream not started) is retried.
+            if current_direction != sent_direction and update_input(current_direction):
+                sent_direction = current_direction
 
             # --- Send Chat Message ---
-            if message_to_send:
-                self.network_handler.send_chat_message(message_to_send)
+            if messages_to_send:
+                self.network_handler.send_chat_messages(messages_to_send)
 
             # --- Process Incoming Server Messages ---
-            self._process_server_messages()
+            process_messages()
 
             # --- Rendering ---
-            render_ok = self.renderer.render_game_world(self.state_manager)
-            # Only draw chat if game world rendered ok (no connection error)
-            if render_ok:
-                # Draw chat UI on top
-                self.chat_manager.draw(self.renderer.screen)
+            # Skipped when the frame would be identical: no state published, no
+            # player mid-glide and no chat change since the last one drawn
+            version = get_version()  # Read first; a change while drawing redraws next frame
+            redraw = version != drawn_version or renderer.animating or chat_needs_redraw()
+            now = get_ticks()
+            if redraw and now >= next_render:
+                next_render += render_ms
+                if next_render <= now:
+                    next_render = now + render_ms  # After an idle gap or a slow frame
+                render_ok = render_world(state_manager)
+                # Only draw chat if game world rendered ok (no connection error)
+                if render_ok:
+                    # Draw chat UI on top
+                    draw_chat(screen)
 
-            pygame.display.flip()  # Update the full screen surface
+                flip()  # Update the full screen surface
+                drawn_version = version
             # --- End Rendering ---
 
-            self.clock.tick(config.FPS)  # Cap the frame rate
+            # Sleep until an input event, the next frame's slot (when one is
+            # wanted) or the next poll, whichever comes first, so a key press is
+            # handled and sent at once rather than after the rest of the frame.
+            # The wait releases the GIL to the network threads.
+            deadline = next_render if redraw else pass_start + poll_ms
+            event = event_wait(max(1, math.ceil(deadline - get_ticks())))
+            if event.type != pygame.NOEVENT:
+                woken_by = event
 
         # --- Cleanup ---
         print("Client: Exiting main loop.")
@@ -252,7 +340,11 @@ class GameClient:
         print("Client: Shutdown complete.")
 
 
-if __name__ == "__main__":
+def main():
+    """Runs the client until the window is closed (python -m client.main)."""
+    # Per-message warnings/errors go through logging; CLIENT_LOG_LEVEL=DEBUG shows more
+    logging.basicConfig(level=os.environ.get("CLIENT_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
     # Ensure Pygame initializes fonts correctly before GameClient uses them
     pygame.init()
     pygame.font.init()  # Explicitly init font system
@@ -261,15 +353,18 @@ if __name__ == "__main__":
     client = GameClient()
     try:
         client.run()
-    except Exception as e:
-        print(f"An unexpected error occurred in the main client: {e}")
-        traceback.print_exc()
+    except Exception:
+        log.exception("An unexpected error occurred in the main client")  # With traceback
         # Attempt graceful shutdown on error
         try:
             client.shutdown()
-        except Exception as shutdown_e:
-            print(f"Error during shutdown: {shutdown_e}")
+        except Exception:
+            log.exception("Error during shutdown")
     finally:
         # Ensure pygame quits even if shutdown fails
         if pygame.get_init():
             pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
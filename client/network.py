@@ -1,9 +1,11 @@
 # client/network.py
 import grpc
+import logging
 import threading
 import time
 import queue
 import sys
+from collections import deque
 
 try:
     from gen.python import game_pb2        # <-- Import 1
@@ -19,24 +21,67 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .state import GameStateManager
 
+# Per-message paths log lazily; connection lifecycle still prints
+log = logging.getLogger(__name__)
+
+# Cadence for repeating the held direction; the server advances one step per input.
+INPUT_SEND_INTERVAL = 1.0 / 30.0
+# While idle (UNKNOWN) repeats are suppressed; resend this often as a heartbeat.
+INPUT_HEARTBEAT_INTERVAL = 2.0
+# Put on outgoing_queue (by stop()) to end the generator's wait without sending
+_WAKEUP = object()
+# HTTP/2 keepalive pings hold the connection open while idle (the server allows
+# one every 10s); write buffering is off so small input messages go out
+# immediately; a 1 MB stream window lets delta bursts through without waiting on
+# flow-control updates. Compression is off: inputs and deltas are a few bytes
+# each, so gzip only costs CPU per message on both ends.
+CHANNEL_OPTIONS = [
+    ('grpc.default_compression_algorithm', grpc.Compression.NoCompression.value),
+    ('grpc.keepalive_time_ms', 20000),
+    ('grpc.keepalive_timeout_ms', 5000),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.http2.min_time_between_pings_ms', 10000),
+    ('grpc.http2.write_buffer_size', 0),
+    ('grpc.http2.lookahead_bytes', 1 << 20),
+    ('grpc.max_receive_message_length', 8 << 20),
+]
+
 
 class NetworkHandler:
     """Handles gRPC communication in a separate thread."""
 
-    def __init__(self, server_address: str, state_manager: 'GameStateManager', incoming_queue: queue.Queue):
+    def __init__(self, server_address: str, state_manager: 'GameStateManager'):
         self.server_address = server_address
-        self.state_manager = state_manager  # Used only for setting connection errors
-        # Queue to send received messages to main thread
-        self.incoming_queue = incoming_queue
+        self.state_manager = state_manager  # Applied to by the state thread
+        # Received chat messages for the main thread. The listener is the only
+        # producer and drain_incoming() the only consumer; deque append/popleft
+        # are atomic, so the pair needs no lock
+        self.incoming_queue = deque()
+        # Map and delta updates for the state thread, which applies them to the
+        # state manager while the main thread renders the last published snapshot
+        self.state_queue = deque()
+        self.state_condition = threading.Condition()
+        self.state_thread = None
         self.outgoing_queue = queue.Queue()  # Queue for main thread to send messages (chat)
+        # Last direction queued; main thread only (the generator sees directions
+        # solely as messages on outgoing_queue), so it needs no lock
         self.input_direction = game_pb2.PlayerInput.Direction.UNKNOWN
-        self.direction_lock = threading.Lock()
+        self._input_messages = {}  # Direction -> prebuilt PlayerInput ClientMessage
         self.stop_event = threading.Event()
         self.thread = None
         self.stub = None
         self.channel = None
         self._username_to_send = "Player"
         self._stream_started = threading.Event()
+        # Set once InitialMapData (carrying our player ID) has been applied, or when
+        # the state thread exits first, so the main thread can block instead of polling
+        self.map_data_received = threading.Event()
+        # ServerMessage oneof field -> handler for its payload
+        self._server_dispatch = {
+            "initial_map_data": self._enqueue_map_data,
+            "delta_update": self._enqueue_delta,
+            "chat_message": self._enqueue_chat,
+        }
 
     def set_username(self, username: str):
         """Sets the username to be sent in ClientHello."""
@@ -55,54 +100,146 @@ class NetworkHandler:
             self._stream_started.set()
 
             # 2. Send other messages (Chat first, then Input)
+            idle_direction = game_pb2.PlayerInput.Direction.UNKNOWN
+            last_sent_direction = idle_direction
+            last_input_sent_at = 0.0  # Sends an idle input straight away
             while not self.stop_event.is_set():
                 outgoing_msg_to_yield = None
                 try:
-                    # Check for priority messages (like chat) first, non-blocking
-                    retrieved_item = self.outgoing_queue.get_nowait()
+                    # Direction changes arrive on the queue; in between, repeat the last
+                    # direction while moving (one server step per input) and heartbeat
+                    # while idle. Anything queued ends the wait early.
+                    interval = (INPUT_HEARTBEAT_INTERVAL if last_sent_direction == idle_direction
+                                else INPUT_SEND_INTERVAL)
+                    wait_for = interval - (time.monotonic() - last_input_sent_at)
+                    try:
+                        if wait_for > 0:
+                            retrieved_item = self.outgoing_queue.get(timeout=wait_for)
+                        else:
+                            retrieved_item = self.outgoing_queue.get_nowait()
+                    except queue.Empty:
+                        retrieved_item = None
 
+                    if retrieved_item is _WAKEUP:
+                        continue  # Re-check stop flag
                     if isinstance(retrieved_item, game_pb2.ClientMessage):
                         outgoing_msg_to_yield = retrieved_item
-                        # print(f"NetHandler GEN: Found ClientMessage in outgoing queue!") # Verbose log
+                        if retrieved_item.HasField("player_input"):
+                            last_sent_direction = retrieved_item.player_input.direction
+                            last_input_sent_at = time.monotonic()
                     else:
-                        print(
-                            f"NetHandler GEN: Error - Unexpected item type in outgoing queue: {type(retrieved_item)}")
-                        raise queue.Empty  # Fallback
-
-                except queue.Empty:
-                    # No priority message OR unexpected type found, send current player input
-                    with self.direction_lock:
-                        dir_to_send = self.input_direction
-                    input_msg = game_pb2.PlayerInput(direction=dir_to_send)
-                    outgoing_msg_to_yield = game_pb2.ClientMessage(
-                        player_input=input_msg)
+                        if retrieved_item is not None:
+                            log.error("NetHandler GEN: Unexpected item type in outgoing queue: %s",
+                                      type(retrieved_item))
+                        # Interval elapsed: repeat the last direction
+                        outgoing_msg_to_yield = self._input_message(last_sent_direction)
+                        last_input_sent_at = time.monotonic()
 
                 except Exception as e:
-                    print(
-                        f"NetHandler GEN OutQueue Err: Type={type(e).__name__}, Msg='{e}'")
+                    log.error("NetHandler GEN OutQueue Err: Type=%s, Msg='%s'",
+                              type(e).__name__, e)
                     # Fallback to sending input
-                    with self.direction_lock:
-                        dir_to_send = self.input_direction
-                    input_msg = game_pb2.PlayerInput(direction=dir_to_send)
-                    outgoing_msg_to_yield = game_pb2.ClientMessage(
-                        player_input=input_msg)
+                    outgoing_msg_to_yield = self._input_message(last_sent_direction)
+                    last_input_sent_at = time.monotonic()
 
                 if outgoing_msg_to_yield:
-                    msg_type = outgoing_msg_to_yield.WhichOneof(
-                        'payload')  # Use correct oneof name
-                    # print(f"NetHandler GEN: Yielding ClientMessage containing '{msg_type}'") # Verbose log
                     yield outgoing_msg_to_yield
                 # else: This case should not be reachable now
 
-                # Prevent busy-waiting
-                time.sleep(1.0 / 30.0)  # Approx 30Hz
-
         except Exception as e:
             # Catch errors during initial yield or loop setup
             print(f"NetHandler GEN: Unhandled error in generator: {e}")
             self.stop_event.set()  # Stop the handler if generator fails
             # Potentially signal error to main thread more directly here
 
+    def _input_message(self, direction):
+        """Returns the (shared, never mutated) ClientMessage for a movement direction."""
+        msg = self._input_messages.get(direction)
+        if msg is None:
+            msg = game_pb2.ClientMessage(
+                player_input=game_pb2.PlayerInput(direction=direction))
+            self._input_messages[direction] = msg
+        return msg
+
+    def _enqueue_incoming(self, message_type, message_data):
+        """Hands a received message to the main thread."""
+        self.incoming_queue.append((message_type, message_data))
+
+    def _enqueue_chat(self, chat_message):
+        """Hands a ChatMessage to the main thread."""
+        self._enqueue_incoming("chat", chat_message)
+
+    def _enqueue_map_data(self, map_data):
+        """Hands InitialMapData to the state thread."""
+        with self.state_condition:
+            self.state_queue.append(("map_data", map_data))
+            self.state_condition.notify()
+
+    def _enqueue_delta(self, delta_update):
+        """Folds a DeltaUpdate into the pending change set at the tail of the state queue.
+
+        Deltas arriving while the state thread is busy become one
+        ("delta_update", (updated, removed)) entry: updated maps player_id ->
+        latest Player proto, removed is the set of IDs removed since. A player ID
+        is in at most one of the two. A map message ends the run, so ordering
+        against it is kept.
+        """
+        with self.state_condition:
+            if self.state_queue and self.state_queue[-1][0] == "delta_update":
+                updated, removed = self.state_queue[-1][1]
+            else:
+                updated, removed = {}, set()
+                self.state_queue.append(("delta_update", (updated, removed)))
+            for player_id in delta_update.removed_player_ids:
+                updated.pop(player_id, None)
+                removed.add(player_id)
+            for player in delta_update.updated_players:
+                updated[player.id] = player
+                removed.discard(player.id)
+            self.state_condition.notify()
+
+    def _apply_state_updates(self):
+        """The state thread: applies queued map and delta updates as they arrive.
+
+        Runs until stop is signalled and the queue is empty, so a map received just
+        before the stream died still reaches the state manager.
+        """
+        state_manager = self.state_manager
+        try:
+            while True:
+                with self.state_condition:
+                    while not self.state_queue:
+                        if self.stop_event.is_set():
+                            return
+                        self.state_condition.wait()
+                    pending, self.state_queue = self.state_queue, deque()
+                try:
+                    for message_type, message_data in pending:
+                        if message_type == "delta_update":
+                            updated, removed = message_data
+                            state_manager.apply_player_changes(updated.values(), removed)
+                        else:  # "map_data"
+                            state_manager.set_initial_map_data(message_data)
+                            self.map_data_received.set()
+                except Exception:
+                    log.exception("NetHandler: Error applying state update")
+        finally:
+            self.map_data_received.set()  # Wake a waiter; stop_event tells it why
+
+    def _wake_state_thread(self):
+        """Wakes the state thread so it can see stop_event."""
+        with self.state_condition:
+            self.state_condition.notify()
+
+    def drain_incoming(self) -> list:
+        """Returns every message received since the last call (main thread only)."""
+        incoming = self.incoming_queue
+        if not incoming:
+            return []
+        # Takes only what is queued now; anything appended meanwhile waits a frame
+        popleft = incoming.popleft
+        return [popleft() for _ in range(len(incoming))]
+
     def _listen_for_updates(self):
         """The main loop for the network thread."""
         print("NetHandler: Connecting...")
@@ -111,18 +248,16 @@ class NetworkHandler:
             stream = self.stub.GameStream(self._message_generator())
             print("NetHandler: Stream started.")
 
-            # Process incoming messages from server
+            # Process incoming messages from server: one oneof lookup, then dispatch
+            dispatch = self._server_dispatch
+            stop_event = self.stop_event
             for message in stream:
-                if self.stop_event.is_set():
+                if stop_event.is_set():
                     break
-                if message.HasField("initial_map_data"):
-                    self.incoming_queue.put(
-                        ("map_data", message.initial_map_data))
-                elif message.HasField("delta_update"):
-                    self.incoming_queue.put(
-                        ("delta_update", message.delta_update))
-                elif message.HasField("chat_message"):
-                    self.incoming_queue.put(("chat", message.chat_message))
+                kind = message.WhichOneof("message")
+                handler = dispatch.get(kind)
+                if handler:
+                    handler(getattr(message, kind))
 
         except grpc.RpcError as e:
             # Handle gRPC specific errors (connection loss, etc.)
@@ -145,30 +280,42 @@ class NetworkHandler:
             print("NetHandler: Listener finished.")
             self._stream_started.clear()  # Clear stream readiness signal
             self.stop_event.set()  # Ensure stop is set on any exit path
+            self._wake_state_thread()
 
     def send_chat_message(self, text: str):
         """Queues a chat message to be sent to the server."""
-        if self._stream_started.is_set() and text:
+        self.send_chat_messages((text,))
+
+    def send_chat_messages(self, texts):
+        """Queues chat messages to be sent to the server, in order."""
+        if not self._stream_started.is_set():
+            log.warning("NetHandler SEND: Cannot send chat, stream not ready.")
+            return
+        put = self.outgoing_queue.put
+        for text in texts:
+            if not text:
+                log.warning("NetHandler SEND: Ignoring empty chat message.")
+                continue
             chat_req = game_pb2.SendChatMessageRequest(message_text=text)
-            client_msg = game_pb2.ClientMessage(send_chat_message=chat_req)
-            # print(f"NetHandler SEND: Putting chat: '{text[:30]}...'") # Verbose log
-            self.outgoing_queue.put(client_msg)
-            # print(f"NetHandler SEND: OutQueue size: {self.outgoing_queue.qsize()}") # Verbose log
-        elif not text:
-            print("NetHandler SEND: Ignoring empty chat message.")
-        else:
-            print("NetHandler SEND: Cannot send chat, stream not ready.")
+            log.debug("NetHandler SEND: Putting chat: '%.30s...'", text)
+            put(game_pb2.ClientMessage(send_chat_message=chat_req))  # Also wakes the generator
 
     def start(self) -> bool:
         """Connects to the server and starts the network thread."""
         print(f"NetHandler: Attempting to connect to {self.server_address}...")
         try:
-            self.channel = grpc.insecure_channel(self.server_address)
+            self.channel = grpc.insecure_channel(
+                self.server_address, options=CHANNEL_OPTIONS)
             grpc.channel_ready_future(self.channel).result(timeout=5)
             print("NetHandler: Channel connected.")
             self.stub = game_pb2_grpc.GameServiceStub(self.channel)
             self.stop_event.clear()
             self._stream_started.clear()
+            self.map_data_received.clear()
+            self.state_queue.clear()
+            self.state_thread = threading.Thread(
+                target=self._apply_state_updates, daemon=True)
+            self.state_thread.start()
             self.thread = threading.Thread(
                 target=self._listen_for_updates, daemon=True)
             self.thread.start()
@@ -192,7 +339,9 @@ class NetworkHandler:
     def stop(self):
         """Signals the network thread to stop and cleans up resources."""
         print("NetHandler: Stopping...")
-        self.stop_event.set()  # Signal generator and listener loops
+        self.stop_event.set()  # Signal generator, listener and state loops
+        self.outgoing_queue.put(_WAKEUP)
+        self._wake_state_thread()
         if self.channel:
             print("NetHandler: Closing channel...")
             self.channel.close()
@@ -202,12 +351,20 @@ class NetworkHandler:
             self.thread.join(timeout=1.0)  # Wait briefly for thread exit
             if self.thread.is_alive():
                 print("NetHandler: Warning - Listener thread did not exit cleanly.")
+        if self.state_thread and self.state_thread.is_alive():
+            self.state_thread.join(timeout=1.0)
         print("NetHandler: Stopped.")
 
     def update_input_direction(self, new_direction):
-        """Thread-safely updates the movement direction to be sent."""
-        # Only update if the stream has been started (ClientHello sent)
-        if self._stream_started.is_set():
-            with self.direction_lock:
-                if self.input_direction != new_direction:
-                    self.input_direction = new_direction
+        """Updates the movement direction to be sent (main thread only).
+
+        Returns False if the stream has not started yet (ClientHello not sent), so
+        the caller can retry the change later; True once the direction is current.
+        """
+        if not self._stream_started.is_set():
+            return False
+        if self.input_direction != new_direction:
+            self.input_direction = new_direction
+            # Edge-triggered: the generator sends it now and repeats it from there
+            self.outgoing_queue.put(self._input_message(new_direction))
+        return True
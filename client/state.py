@@ -1,24 +1,51 @@
 # client/state.py
 import threading
+import time
 from gen.python import game_pb2
 
 # Import config constants if needed directly, or receive them via methods
-from .config import AVAILABLE_COLORS
+from .config import AVAILABLE_COLORS, INTERPOLATION_MAX_INTERVAL, PLAYER_SLOT_CAPACITY
 
 
 class GameStateManager:
     """Manages the client-side game state by applying delta updates."""
 
     def __init__(self):
+        # Single writer lock. Writers never mutate what readers can see: players and
+        # map are published as immutable snapshots rebound in one assignment (atomic
+        # under the GIL), so every getter used by the render path is lock-free.
         self.state_lock = threading.Lock()
-        self.map_lock = threading.Lock()
-        self.color_lock = threading.Lock()
 
         self.latest_game_state = game_pb2.GameState()  # Internal representation
-        self.players_map = {}  # Map[player_id, Player_protobuf]
+        # Players as a slot table of parallel lists (structure-of-arrays): slot i of
+        # every list describes the same player, and a player keeps its slot from
+        # first sighting until removal. Free slots have player_ids[i] = None. Values
+        # are copied out of the Player proto once per delta so the renderer reads
+        # plain Python values in a linear scan.
+        self.player_ids = []
+        self.player_xs = []
+        self.player_ys = []
+        self.player_states = []
+        self.player_usernames = []
+        self.player_color_list = []
+        # Remote players glide from (prev_x, prev_y) at t_prev to (x, y) at t_next
+        self.player_prev_xs = []
+        self.player_prev_ys = []
+        self.player_t_prevs = []
+        self.player_t_nexts = []
+        self._player_index = {}  # Map[player_id, slot]
+        self._free_slots = []  # Stack of free slots, lowest slot on top
+        self._slots_in_use = 0  # One past the highest slot ever handed out
+        self._grow_slots(PLAYER_SLOT_CAPACITY)
+        # Published copy for readers: ((ids, xs, ys, states, usernames, colors,
+        # prev_xs, prev_ys, t_prevs, t_nexts), index)
+        self._player_snapshot = ((),) * 10, {}
 
         self.my_player_id = None
         self.connection_error_message = None
+        # Bumped after every published change, so the renderer can skip frames
+        # in which nothing it draws has changed
+        self.version = 0
 
         # Map data
         self.world_map_data = None
@@ -27,55 +54,175 @@ class GameStateManager:
         self.world_pixel_width = 0.0
         self.world_pixel_height = 0.0
         self.tile_size = 32  # Default
+        # Published copy for readers: (map_data, width, height, tile_size, world_w, world_h)
+        self._map_snapshot = (None, 0, 0, self.tile_size, 0.0, 0.0)
 
         # Player appearance
-        self.player_colors = {}
         self.next_color_index = 0
 
+    def _player_columns(self):
+        """Returns the parallel player lists in snapshot order."""
+        return (self.player_ids, self.player_xs, self.player_ys,
+                self.player_states, self.player_usernames, self.player_color_list,
+                self.player_prev_xs, self.player_prev_ys,
+                self.player_t_prevs, self.player_t_nexts)
+
+    def _grow_slots(self, capacity):
+        """Pre-allocates the slot columns up to capacity."""
+        old_capacity = len(self.player_ids)
+        extra = capacity - old_capacity
+        for column in self._player_columns():
+            column.extend([None] * extra)
+        # Push in reverse so the lowest new slot is handed out first
+        self._free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+
+    def _alloc_slot(self):
+        """Takes a free slot, doubling the table if all slots are in use."""
+        if not self._free_slots:
+            self._grow_slots(len(self.player_ids) * 2)
+        slot = self._free_slots.pop()
+        if slot >= self._slots_in_use:
+            self._slots_in_use = slot + 1
+        return slot
+
     def apply_delta_update(self, delta_update):
         """Applies changes from a DeltaUpdate message to the local state."""
-        with self.state_lock, self.color_lock:  # Combine locks
+        self.apply_player_changes(
+            delta_update.updated_players, delta_update.removed_player_ids)
+
+    def apply_player_changes(self, updated_players, removed_player_ids):
+        """Applies added/updated Player protos and removed IDs in one locked pass."""
+        with self.state_lock:
             # Process removed players
-            for removed_id in delta_update.removed_player_ids:
-                if removed_id in self.players_map:
-                    del self.players_map[removed_id]
+            for removed_id in removed_player_ids:
+                index = self._player_index.pop(removed_id, None)
+                if index is not None:
+                    self.player_ids[index] = None
+                    self.player_usernames[index] = None
+                    self._free_slots.append(index)
                     # print(f"StateMgr: Player {removed_id} removed.") # Optional log
-                if removed_id in self.player_colors:
-                    del self.player_colors[removed_id]
 
-            # Process updated/added players
-            for updated_player in delta_update.updated_players:
+            # Process updated/added players. Columns are bound to locals and each
+            # proto field is read exactly once per player.
+            player_index = self._player_index
+            ids, xs, ys = self.player_ids, self.player_xs, self.player_ys
+            states, usernames = self.player_states, self.player_usernames
+            prev_xs, prev_ys = self.player_prev_xs, self.player_prev_ys
+            t_prevs, t_nexts = self.player_t_prevs, self.player_t_nexts
+            my_player_id = self.my_player_id
+            now = time.monotonic()
+            for updated_player in updated_players:
                 player_id = updated_player.id
-                # Add or update player in the map
-                self.players_map[player_id] = updated_player
-                # Assign color if new
-                if player_id not in self.player_colors:
-                    self.player_colors[player_id] = AVAILABLE_COLORS[self.next_color_index % len(
+                x_pos = updated_player.x_pos
+                y_pos = updated_player.y_pos
+                anim_state = updated_player.current_animation_state
+                username = updated_player.username
+                index = player_index.get(player_id)
+                if index is None:
+                    # New player: take a free slot and assign the next palette color
+                    index = self._alloc_slot()  # Columns grow in place, locals stay valid
+                    player_index[player_id] = index
+                    ids[index] = player_id
+                    xs[index] = prev_xs[index] = x_pos
+                    ys[index] = prev_ys[index] = y_pos
+                    states[index] = anim_state
+                    usernames[index] = username
+                    t_prevs[index] = t_nexts[index] = now
+                    self.player_color_list[index] = AVAILABLE_COLORS[self.next_color_index % len(
                         AVAILABLE_COLORS)]
                     self.next_color_index += 1
                     # print(f"StateMgr: Player {player_id} added/updated.") # Optional log
+                else:
+                    if x_pos != xs[index] or y_pos != ys[index]:
+                        t_prev, t_next = t_prevs[index], t_nexts[index]
+                        if player_id == my_player_id:
+                            # Own player is drawn where the server put it, no lag
+                            prev_xs[index], prev_ys[index] = x_pos, y_pos
+                            t_prevs[index] = t_nexts[index] = now
+                        else:
+                            # Start from where the player is currently drawn and
+                            # glide over the gap between the last two moves
+                            if now < t_next:
+                                alpha = (now - t_prev) / (t_next - t_prev)
+                                prev_xs[index] = prev_xs[index] + (xs[index] - prev_xs[index]) * alpha
+                                prev_ys[index] = prev_ys[index] + (ys[index] - prev_ys[index]) * alpha
+                            else:
+                                prev_xs[index], prev_ys[index] = xs[index], ys[index]
+                            t_prevs[index] = now
+                            t_nexts[index] = now + min(now - t_prev, INTERPOLATION_MAX_INTERVAL)
+                    xs[index] = x_pos
+                    ys[index] = y_pos
+                    states[index] = anim_state
+                    usernames[index] = username
 
-    def get_state_snapshot_map(self):
-        """Returns a *reference* to the internal players map. Use with caution or copy."""
-        # This is efficient but requires careful handling by the caller (Renderer)
-        with self.state_lock:
-            return self.players_map
+            # Publish: a single attribute store is atomic, so readers see either the
+            # previous snapshot or this one, never a half-applied delta.
+            in_use = self._slots_in_use
+            self._player_snapshot = (
+                tuple(tuple(column[:in_use]) for column in self._player_columns()),
+                dict(self._player_index))
+            self.version += 1
 
-    def set_initial_map_data(self, map_proto):
-        """Sets the initial map data and own player ID."""
-        print(
-            f"StateMgr: Received map data: {map_proto.tile_width}x{map_proto.tile_height} tiles")
-        temp_map = []
+    def get_player_arrays(self):
+        """Returns the latest immutable player snapshot.
+
+        Columns: (ids, xs, ys, states, usernames, colors, prev_xs, prev_ys, t_prevs,
+        t_nexts), indexed by slot; free slots have an id of None. xs/ys are the
+        latest server positions; the prev/t columns let the renderer interpolate
+        towards them on the time.monotonic() clock.
+        """
+        return self._player_snapshot[0]
+
+    def get_player_position(self, player_id):
+        """Returns (x, y) for a player, or None if the player is unknown."""
+        columns, index_map = self._player_snapshot
+        index = index_map.get(player_id)
+        if index is None:
+            return None
+        return columns[1][index], columns[2][index]
+
+    @staticmethod
+    def _build_ragged_map(map_proto):
+        """Builds flat map bytes when rows are missing, short or out of byte range."""
+        width = map_proto.tile_width
+        temp_map = bytearray(width * map_proto.tile_height)
         for y in range(map_proto.tile_height):
             # Ensure row exists before accessing tiles
             if y < len(map_proto.rows):
-                temp_map.append(list(map_proto.rows[y].tiles))
+                tiles = map_proto.rows[y].tiles[:width]
+                try:
+                    row_bytes = bytes(tiles)
+                except ValueError:
+                    print(f"Warning: Tile ID out of range in map row {y}.")
+                    # IDs that don't fit a byte have no graphic; 255 draws nothing
+                    row_bytes = bytes(t if 0 <= t < 256 else 255 for t in tiles)
+                # Short rows are padded with 255 (no tile), as they drew nothing before
+                temp_map[y*width:(y+1)*width] = row_bytes.ljust(width, b'\xff')
             else:
                 print(f"Warning: Missing row {y} in map data proto.")
-                # Add empty row as fallback
-                temp_map.append([0] * map_proto.tile_width)
+                # Row stays as zeros (fallback tile)
+        return bytes(temp_map)
+
+    def set_initial_map_data(self, map_proto):
+        """Sets the initial map data and own player ID."""
+        print(
+            f"StateMgr: Received map data: {map_proto.tile_width}x{map_proto.tile_height} tiles")
+        # Flat row-major tile IDs, one byte per tile: tile (x, y) is at y*width + x
+        width = map_proto.tile_width
+        height = map_proto.tile_height
+        rows = map_proto.rows
+        temp_map = None
+        # Fast path: every row present and full width, one join of the packed rows.
+        # Slicing copies a row out in one C call, quicker than iterating it
+        if len(rows) == height and all(len(row.tiles) == width for row in rows):
+            try:
+                temp_map = b''.join([bytes(row.tiles[:]) for row in rows])
+            except ValueError:
+                pass  # A tile ID doesn't fit in a byte; handled below
+        if temp_map is None:
+            temp_map = self._build_ragged_map(map_proto)
 
-        with self.map_lock:
+        with self.state_lock:
             self.world_map_data = temp_map
             self.map_width_tiles = map_proto.tile_width
             self.map_height_tiles = map_proto.tile_height
@@ -84,44 +231,47 @@ class GameStateManager:
             self.tile_size = map_proto.tile_size_pixels
             print(
                 f"StateMgr: World set to {self.world_pixel_width}x{self.world_pixel_height}px, Tile Size: {self.tile_size}px")
-
-        # Must set player ID outside map_lock but before returning control
-        with self.state_lock:
+            self._map_snapshot = (temp_map, self.map_width_tiles, self.map_height_tiles,
+                                  self.tile_size, self.world_pixel_width, self.world_pixel_height)
+            # Published after the map, so a reader that sees the ID also sees the map
             self.my_player_id = map_proto.assigned_player_id
             print(f"StateMgr: Received own player ID: {self.my_player_id}")
+            self.version += 1
 
     def get_map_data(self):
-        """Thread-safely gets map data."""
-        with self.map_lock:
-            return self.world_map_data, self.map_width_tiles, self.map_height_tiles, self.tile_size
+        """Gets map data (flat row-major tile bytes, width, height, tile size)."""
+        return self._map_snapshot[:4]
 
     def get_world_dimensions(self):
         """Gets world pixel dimensions."""
-        with self.map_lock:
-            return self.world_pixel_width, self.world_pixel_height
+        return self._map_snapshot[4:]
 
     def get_my_player_id(self):
-        """Thread-safely gets the player's own ID."""
-        with self.state_lock:
-            return self.my_player_id
+        """Gets the player's own ID (a single attribute read, no lock needed)."""
+        return self.my_player_id
 
     def get_player_color(self, player_id):
-        """Thread-safely gets the color for a player."""
-        with self.color_lock:
-            # Default white
-            return self.player_colors.get(player_id, (255, 255, 255))
+        """Gets the color for a player from the latest snapshot."""
+        columns, index_map = self._player_snapshot
+        index = index_map.get(player_id)
+        # Default white
+        return columns[5][index] if index is not None else (255, 255, 255)
 
     def get_all_player_colors(self):
-        """Thread-safely gets a copy of the color map."""
-        with self.color_lock:
-            return self.player_colors.copy()
+        """Gets a copy of the color map from the latest snapshot."""
+        columns, _ = self._player_snapshot
+        return {pid: color for pid, color in zip(columns[0], columns[5]) if pid is not None}
 
     def set_connection_error(self, error_msg):
         """Sets the connection error message."""
         with self.state_lock:
             self.connection_error_message = error_msg
+            self.version += 1
+
+    def get_version(self):
+        """Gets the change counter (a single attribute read, no lock needed)."""
+        return self.version
 
     def get_connection_error(self):
         """Gets the current connection error message."""
-        with self.state_lock:
-            return self.connection_error_message
+        return self.connection_error_message
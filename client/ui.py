@@ -3,7 +3,8 @@ import pygame
 import time
 import textwrap
 import hashlib
-from collections import deque
+from collections import deque, OrderedDict
+from functools import lru_cache
 from typing import Union
 
 from gen.python import game_pb2
@@ -15,19 +16,45 @@ from .config import (SCREEN_WIDTH, SCREEN_HEIGHT, BACKGROUND_COLOR,
                      CHAT_TIMESTAMP_COLOR, CHAT_DEFAULT_USERNAME_COLOR, CHAT_MY_MESSAGE_COLOR,
                      CHAT_OTHER_MESSAGE_COLOR, CHAT_INPUT_PROMPT_COLOR, CHAT_INPUT_ACTIVE_COLOR,
                      CHAT_INPUT_BOX_COLOR_ACTIVE, CHAT_INPUT_BOX_COLOR_INACTIVE,
-                     CHAT_INPUT_BORDER_COLOR_ACTIVE, CHAT_HISTORY_BG_COLOR)
+                     CHAT_INPUT_BORDER_COLOR_ACTIVE, CHAT_HISTORY_BG_COLOR,
+                     MAP_PREBAKE_MAX_PIXELS, MAP_CHUNK_TILES, MAP_CHUNK_CACHE_SIZE,
+                     USERNAME_CACHE_SIZE, CHAT_TEXT_CACHE_SIZE, AVAILABLE_COLORS, VSYNC,
+                     MAX_FPS, VSYNC_PROBE_FLIPS)
 from .utils import resource_path
 
 
+@lru_cache(maxsize=512)
+def _username_color(username: str) -> tuple[int, int, int]:
+    """Hashes a username to a chat color; cached, as names repeat every frame."""
+    if not username:
+        return CHAT_DEFAULT_USERNAME_COLOR
+    # Use SHA1 hash and map bytes to RGB values
+    hasher = hashlib.sha1(username.encode('utf-8'))
+    hash_bytes = hasher.digest()
+    # Generate RGB, ensuring values are reasonably bright (100-255 range)
+    r = 100 + (hash_bytes[0] % 156)
+    g = 100 + (hash_bytes[1] % 156)
+    b = 100 + (hash_bytes[2] % 156)
+    return (r, g, b)
+
+
 class ChatManager:
     """Handles chat UI state, input, and rendering with UI polish."""
 
     def __init__(self, max_history=MAX_CHAT_HISTORY):
         self.active = False
         self.input_text = ""
-        # Stores tuples: (timestamp, sender_username, message_text)
-        self.history = deque(maxlen=max_history)
+        # History as parallel deques (index i of each is the same message); always
+        # appended together so they stay aligned when maxlen drops the oldest
+        self._timestamps = deque(maxlen=max_history)
+        self._senders = deque(maxlen=max_history)
+        self._messages = deque(maxlen=max_history)
+        self._time_strs = deque(maxlen=max_history)  # Formatted once on arrival
+        self._user_colors = deque(maxlen=max_history)
+        self._wrapped = deque(maxlen=max_history)  # Wrapped once on arrival
         self.my_username = ""  # Will be set later by GameClient
+        # Rendered text keyed by (font, text, color); history lines repeat every frame
+        self._text_cache = OrderedDict()
 
         # Load font (handle potential error)
         try:
@@ -41,27 +68,59 @@ class ChatManager:
             self.font = pygame.font.SysFont(None, 22)  # Fallback history font
             self.input_font = pygame.font.SysFont(
                 None, 24)  # Fallback input font
+        # History layout; messages are wrapped once when they arrive
+        self.history_x = 10
+        self.history_y = 10
+        self.max_history_width = SCREEN_WIDTH * 0.6  # Limit history width
+        self._char_width = self.font.size("A")[0]
+        # Chat background allocated once at its largest size; draw() blits the
+        # part covering the current history
+        self._history_bg = pygame.Surface(
+            (int(self.max_history_width) + 4, self.font.get_linesize() * MAX_CHAT_HISTORY),
+            pygame.SRCALPHA)
+        self._history_bg.fill(CHAT_HISTORY_BG_COLOR)
+        # Whole chat composed off-screen; each frame just blits the drawn areas.
+        # History and input field are re-composed separately, so typing and the
+        # cursor blink never redraw the history lines
+        self._chat_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        input_height = self.input_font.get_linesize() + 8
+        self._input_rect = pygame.Rect(
+            5, SCREEN_HEIGHT - 5 - input_height, SCREEN_WIDTH - 10, input_height)
+        self._history_rect = None  # Area the composed history covers, if any
+        self._chat_rects = []
+        self._history_dirty = True
+        self._input_dirty = True
+        self._chat_cursor_shown = False
+
+    def _get_text_surf(self, font, text, color):
+        """Returns rendered text (premultiplied alpha), rendering it only on a cache miss."""
+        cache = self._text_cache
+        key = (font, text, color)
+        surf = cache.get(key)
+        if surf is None:
+            # convert_alpha() first: premul_alpha() mishandles the padded rows
+            # of font-rendered surfaces
+            surf = font.render(text, True, color).convert_alpha().premul_alpha()
+            cache[key] = surf
+            if len(cache) > CHAT_TEXT_CACHE_SIZE:
+                cache.popitem(last=False)  # Evict least recently used
+        else:
+            cache.move_to_end(key)
+        return surf
 
     def set_my_username(self, username: str):
         """Stores the local player's username for highlighting."""
         self.my_username = username
+        self._history_dirty = True  # Own messages use their own color
 
     def _get_color_for_username(self, username: str) -> tuple[int, int, int]:
         """Generates a deterministic color based on username hash."""
-        if not username:
-            return CHAT_DEFAULT_USERNAME_COLOR
-        # Use SHA1 hash and map bytes to RGB values
-        hasher = hashlib.sha1(username.encode('utf-8'))
-        hash_bytes = hasher.digest()
-        # Generate RGB, ensuring values are reasonably bright (100-255 range)
-        r = 100 + (hash_bytes[0] % 156)
-        g = 100 + (hash_bytes[1] % 156)
-        b = 100 + (hash_bytes[2] % 156)
-        return (r, g, b)
+        return _username_color(username)
 
     def toggle_active(self):
         """Toggles chat input mode."""
         self.active = not self.active
+        self._input_dirty = True
         if self.active:
             self.input_text = ""  # Clear text when activating
             pygame.key.set_repeat(500, 50)  # Enable key repeat for typing
@@ -77,9 +136,33 @@ class ChatManager:
 
     def add_message(self, chat_message_proto: game_pb2.ChatMessage):
         """Adds a received message with timestamp to history."""
-        timestamp = time.time()
-        self.history.append(
-            (timestamp, chat_message_proto.sender_username, chat_message_proto.message_text))
+        self._append_history(time.time(), chat_message_proto.sender_username,
+                             chat_message_proto.message_text)
+        self._history_dirty = True
+
+    def _append_history(self, timestamp, sender, message):
+        """Appends one message to every history column."""
+        time_str, wrapped_lines = self._layout_message(timestamp, sender, message)
+        self._timestamps.append(timestamp)
+        self._senders.append(sender)
+        self._messages.append(message)
+        self._time_strs.append(time_str)
+        self._user_colors.append(self._get_color_for_username(sender))
+        self._wrapped.append(wrapped_lines)
+
+    def _layout_message(self, timestamp, sender, message):
+        """Formats the timestamp and wraps the message to the space left after the prefix."""
+        time_str = time.strftime("[%H:%M:%S]", time.localtime(timestamp))
+        text_start_x = (self.history_x + self.font.size(time_str)[0] + 5
+                        + self.font.size(sender)[0] + self.font.size(": ")[0])
+        available_width = max(
+            10, (self.history_x + self.max_history_width) - text_start_x)
+        char_width_approx = self._char_width
+        wrap_width = max(
+            10, int(available_width / char_width_approx)) if char_width_approx > 0 else 20
+        wrapped_lines = textwrap.wrap(
+            message, width=wrap_width, replace_whitespace=False, drop_whitespace=False)
+        return time_str, wrapped_lines
 
     def handle_input_event(self, event: pygame.event.Event) -> Union[str, None]:
         """
@@ -92,6 +175,7 @@ class ChatManager:
 
         message_to_send = None
         deactivate_chat = False
+        self._input_dirty = True  # Input text may change
 
         if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
             if self.input_text:
@@ -113,48 +197,77 @@ class ChatManager:
 
         return message_to_send  # Return the message string or None
 
+    def needs_redraw(self) -> bool:
+        """Returns True if the chat content or the blinking cursor changed since the last draw."""
+        show_cursor = self.active and time.time() % 1.0 < 0.5
+        return (self._history_dirty or self._input_dirty
+                or show_cursor != self._chat_cursor_shown)
+
     def draw(self, screen: pygame.Surface):
-        """Draws the chat history and input field with UI polish."""
-        history_x = 10
-        history_y = 10
+        """Draws the chat, re-composing only the parts whose content or cursor changed."""
+        show_cursor = self.active and time.time() % 1.0 < 0.5
+        surface = self._chat_surface
+        if self._history_dirty:
+            if self._history_rect:
+                surface.fill((0, 0, 0, 0), self._history_rect)
+            self._history_rect = self._compose_history(surface)
+            self._history_dirty = False
+            self._input_dirty = True  # Redrawn on top, as before the split
+        if self._input_dirty or show_cursor != self._chat_cursor_shown:
+            surface.fill((0, 0, 0, 0), self._input_rect)
+            self._compose_input(surface, show_cursor)
+            self._input_dirty = False
+            self._chat_cursor_shown = show_cursor
+            self._chat_rects = [self._input_rect]  # Covers the input box and the hint
+            if self._history_rect:
+                self._chat_rects.append(self._history_rect)
+        # The composite is built from premultiplied pieces, so blending it this way
+        # matches drawing each piece straight onto the screen
+        for rect in self._chat_rects:
+            screen.blit(self._chat_surface, rect, area=rect,
+                        special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def _compose_history(self, surface: pygame.Surface):
+        """Draws the chat history with UI polish; returns the area drawn, or None."""
+        history_rects = []
+        premul = pygame.BLEND_PREMULTIPLIED  # Text and background are premultiplied
+        history_x = self.history_x
+        history_y = self.history_y
         line_height = self.font.get_linesize()
         history_render_limit = line_height * MAX_CHAT_HISTORY
-        max_history_width = SCREEN_WIDTH * 0.6  # Limit history width
-        messages_to_draw = list(self.history)  # Get a copy of recent messages
-        actual_history_height = len(
-            messages_to_draw) * line_height  # Simplified height
+        max_history_width = self.max_history_width
+        message_count = len(self._senders)
+        actual_history_height = message_count * line_height  # Simplified height
         history_area_rect = pygame.Rect(history_x - 2, history_y - 2, max_history_width + 4, min(
             history_render_limit, actual_history_height + 4))  # Pad rect slightly
 
         # --- Draw History Background ---
-        if messages_to_draw:
-            history_bg_surf = pygame.Surface(
-                history_area_rect.size, pygame.SRCALPHA)
-            history_bg_surf.fill(CHAT_HISTORY_BG_COLOR)
-            screen.blit(history_bg_surf, history_area_rect.topleft)
+        if message_count:
+            history_rects.append(surface.blit(self._history_bg, history_area_rect.topleft,
+                                             area=pygame.Rect((0, 0), history_area_rect.size),
+                                             special_flags=premul))
 
         # --- Draw History Text ---
         current_y = history_y
-        for timestamp, sender, message in messages_to_draw:
+        for time_str, sender, username_color, wrapped_lines in zip(
+                self._time_strs, self._senders, self._user_colors, self._wrapped):
             if current_y >= history_y + history_render_limit:
                 break
 
-            time_str = time.strftime("[%H:%M:%S]", time.localtime(timestamp))
             try:
-                time_surf = self.font.render(
-                    time_str, True, CHAT_TIMESTAMP_COLOR)
+                time_surf = self._get_text_surf(
+                    self.font, time_str, CHAT_TIMESTAMP_COLOR)
                 time_rect = time_surf.get_rect(left=history_x, top=current_y)
-                screen.blit(time_surf, time_rect)
+                history_rects.append(surface.blit(time_surf, time_rect, special_flags=premul))
                 current_x = time_rect.right + 5
             except pygame.error as e:
                 print(f"Warn: Render timestamp fail: {e}")
                 current_x = history_x
 
-            username_color = self._get_color_for_username(sender)
             try:
-                user_surf = self.font.render(sender, True, username_color)
+                user_surf = self._get_text_surf(self.font, sender, username_color)
                 user_rect = user_surf.get_rect(left=current_x, top=current_y)
-                screen.blit(user_surf, user_rect)
+                history_rects.append(surface.blit(user_surf, user_rect, special_flags=premul))
                 current_x = user_rect.right
             except pygame.error as e:
                 print(f"Warn: Render username fail: {e}")
@@ -162,33 +275,25 @@ class ChatManager:
             message_color = CHAT_MY_MESSAGE_COLOR if sender == self.my_username else CHAT_OTHER_MESSAGE_COLOR
             message_prefix = ": "
             try:
-                prefix_surf = self.font.render(
-                    message_prefix, True, message_color)
+                prefix_surf = self._get_text_surf(
+                    self.font, message_prefix, message_color)
                 prefix_rect = prefix_surf.get_rect(
                     left=current_x, top=current_y)
-                screen.blit(prefix_surf, prefix_rect)
+                history_rects.append(surface.blit(prefix_surf, prefix_rect, special_flags=premul))
                 text_start_x = prefix_rect.right
             except pygame.error as e:
                 print(f"Warn: Render prefix fail: {e}")
                 text_start_x = current_x + 5
 
-            available_width = max(
-                10, (history_x + max_history_width) - text_start_x)
-            char_width_approx = self.font.size("A")[0]
-            wrap_width = max(
-                10, int(available_width / char_width_approx)) if char_width_approx > 0 else 20
-            wrapped_lines = textwrap.wrap(
-                message, width=wrap_width, replace_whitespace=False, drop_whitespace=False)
-
             start_line_y = current_y
             line_idx = 0
             for line in wrapped_lines:
                 if current_y >= history_y + history_render_limit:
                     break
                 try:
-                    line_surf = self.font.render(line, True, message_color)
+                    line_surf = self._get_text_surf(self.font, line, message_color)
                     line_x = text_start_x  # Keep same indent for wrapped lines
-                    screen.blit(line_surf, (line_x, current_y))
+                    history_rects.append(surface.blit(line_surf, (line_x, current_y), special_flags=premul))
                     current_y += line_height
                     line_idx += 1
                 except pygame.error as e:
@@ -199,29 +304,34 @@ class ChatManager:
             if current_y > history_y + history_render_limit:
                 break
 
-        # --- Draw Input Field ---
-        input_rect_base = pygame.Rect(5, SCREEN_HEIGHT - 5 - (self.input_font.get_linesize(
-        ) + 8), SCREEN_WIDTH - 10, self.input_font.get_linesize() + 8)
+        if history_rects:
+            return history_rects[0].unionall(history_rects[1:])
+        return None
+
+    def _compose_input(self, surface: pygame.Surface, show_cursor: bool):
+        """Draws the input field (or the chat hint) into its fixed area."""
+        premul = pygame.BLEND_PREMULTIPLIED  # Text and background are premultiplied
+        input_rect_base = self._input_rect
         if self.active:
             prompt = "Say: "
             display_text = prompt + self.input_text
-            if time.time() % 1.0 < 0.5:
+            if show_cursor:
                 display_text += "_"
-            pygame.draw.rect(screen, CHAT_INPUT_BOX_COLOR_ACTIVE,
+            pygame.draw.rect(surface, CHAT_INPUT_BOX_COLOR_ACTIVE,
                              input_rect_base, border_radius=3)
-            pygame.draw.rect(screen, CHAT_INPUT_BORDER_COLOR_ACTIVE,
+            pygame.draw.rect(surface, CHAT_INPUT_BORDER_COLOR_ACTIVE,
                              input_rect_base, width=1, border_radius=3)
-            input_surf = self.input_font.render(
-                display_text, True, CHAT_INPUT_ACTIVE_COLOR)
+            input_surf = self._get_text_surf(
+                self.input_font, display_text, CHAT_INPUT_ACTIVE_COLOR)
             input_rect = input_surf.get_rect(
                 left=input_rect_base.left + 5, centery=input_rect_base.centery)
-            screen.blit(input_surf, input_rect)
+            surface.blit(input_surf, input_rect, special_flags=premul)
         else:
-            hint_surf = self.font.render("[T] to chat", True, (150, 150, 150))
+            hint_surf = self._get_text_surf(self.font, "[T] to chat", (150, 150, 150))
             hint_rect = hint_surf.get_rect(
                 left=input_rect_base.left + 5, centery=input_rect_base.centery)
-            # pygame.draw.rect(screen, CHAT_INPUT_BOX_COLOR_INACTIVE, input_rect_base, border_radius=3) # Optional inactive bg
-            screen.blit(hint_surf, hint_rect)
+            # pygame.draw.rect(surface, CHAT_INPUT_BOX_COLOR_INACTIVE, input_rect_base, border_radius=3) # Optional inactive bg
+            surface.blit(hint_surf, hint_rect, special_flags=premul)
 
 
 class Renderer:
@@ -230,7 +340,19 @@ class Renderer:
     def __init__(self, screen_width, screen_height):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.screen = pygame.display.set_mode((screen_width, screen_height))
+        # vsync needs SCALED (or OPENGL); flip() then waits for the vertical blank
+        self.vsync = VSYNC
+        try:
+            self.screen = pygame.display.set_mode(
+                (screen_width, screen_height), pygame.SCALED if VSYNC else 0, vsync=int(VSYNC))
+        except pygame.error as e:
+            print(f"Renderer: VSync unavailable ({e}), capping frame rate instead")
+            self.vsync = False
+            self.screen = pygame.display.set_mode((screen_width, screen_height))
+        if self.vsync and not self._vsync_paces():
+            # Software renderers only warn and flip() returns at once
+            print("Renderer: VSync requested but flips are not paced, capping frame rate instead")
+            self.vsync = False
         pygame.display.set_caption("Simple gRPC Game Client")
         pygame.font.init()  # Still need font init for player names etc.
         self.error_font = pygame.font.SysFont(None, 26)
@@ -240,12 +362,30 @@ class Renderer:
         self.username_color = (230, 230, 230)
 
         self.directional_frames = {}
-        self.tile_graphics = {}
+        # Indexed by tile id; map data is one byte per tile, so 256 slots cover every
+        # id without a bounds check. Ids with no graphic are None.
+        self.tile_graphics = [None] * 256
         self.player_rect = None
         self.tile_size = 32  # Default
+        # Whole map pre-rendered once; rebuilt when the map data or tile size changes
+        self.map_surface = None
+        self._map_surface_source = None
+        self._map_surface_tile_size = 0
+        # Fallback for maps too large to pre-render whole: chunk (x, y) -> Surface
+        self._map_chunks = OrderedDict()
+        # Per-player surfaces built on first use instead of every frame
+        self._tinted_cache = {}  # (animation_state, color) -> tinted sprite, palette pre-filled
+        self._tint_cache = {}  # (color, size) -> overlay shared by every frame of that size
+        self._username_cache = OrderedDict()  # username -> (surface, x offset, y offset), LRU order
         self._load_assets()
         self.camera_x = 0.0
         self.camera_y = 0.0
+        self._half_screen_width = screen_width / 2
+        self._half_screen_height = screen_height / 2
+        self._set_camera_bounds(0.0, 0.0)
+        # True while a player drawn last frame was still gliding, so the next
+        # frame differs even without a state change
+        self.animating = False
 
     def _load_assets(self):
         """Loads game assets (sprites, tileset)."""
@@ -255,10 +395,10 @@ class Renderer:
             tileset_img = pygame.image.load(TILESET_PATH).convert_alpha()
             print(f"Renderer: Loaded tileset from {TILESET_PATH}")
             # TODO: Improve tile graphic extraction if tile size changes significantly
-            self.tile_graphics[0] = tileset_img.subsurface(
-                (0, 0, self.tile_size, self.tile_size))
-            self.tile_graphics[1] = tileset_img.subsurface(
-                (self.tile_size, 0, self.tile_size, self.tile_size))
+            self.tile_graphics[0] = self._to_display_format(tileset_img.subsurface(
+                (0, 0, self.tile_size, self.tile_size)))
+            self.tile_graphics[1] = self._to_display_format(tileset_img.subsurface(
+                (self.tile_size, 0, self.tile_size, self.tile_size)))
 
             # Player Sprite Sheet
             sheet_img = pygame.image.load(SPRITE_SHEET_PATH).convert_alpha()
@@ -268,92 +408,261 @@ class Renderer:
             states = [game_pb2.AnimationState.RUNNING_UP, game_pb2.AnimationState.RUNNING_DOWN,
                       game_pb2.AnimationState.RUNNING_LEFT, game_pb2.AnimationState.RUNNING_RIGHT]
             for state, rect in zip(states, rects):
-                self.directional_frames[state] = sheet_img.subsurface(rect)
+                # Standalone copy rather than a subsurface view into the sheet
+                self.directional_frames[state] = sheet_img.subsurface(rect).convert_alpha()
             self.directional_frames[game_pb2.AnimationState.IDLE] = self.directional_frames[game_pb2.AnimationState.RUNNING_DOWN]
             self.directional_frames[game_pb2.AnimationState.UNKNOWN_STATE] = self.directional_frames[game_pb2.AnimationState.RUNNING_DOWN]
             self.player_rect = self.directional_frames[game_pb2.AnimationState.IDLE].get_rect(
             )
+            self._pretint_frames()
             print(f"Renderer: Assets loaded.")
         except pygame.error as e:
             print(f"Renderer: Error loading assets: {e}")
             raise  # Propagate error
 
+    def _vsync_paces(self):
+        """Times a few flips; True if they wait for the display rather than return at once."""
+        self.screen.fill(BACKGROUND_COLOR)
+        pygame.display.flip()  # The first flip may include one-off setup
+        start = time.perf_counter()
+        for _ in range(VSYNC_PROBE_FLIPS):
+            pygame.display.flip()
+        interval = (time.perf_counter() - start) / VSYNC_PROBE_FLIPS
+        return interval >= 1.0 / MAX_FPS
+
+    def _set_camera_bounds(self, world_width, world_height):
+        """Precomputes the camera clamp for a world size; it only changes with the map."""
+        self._camera_world = (world_width, world_height)
+        # Max camera offset per axis, or None when the world is smaller than the
+        # screen and is centered at a fixed offset instead
+        self._camera_max_x = world_width - self.screen_width if world_width > self.screen_width else None
+        self._camera_max_y = world_height - self.screen_height if world_height > self.screen_height else None
+        self._camera_center_x = (world_width - self.screen_width) / 2
+        self._camera_center_y = (world_height - self.screen_height) / 2
+
     def update_camera(self, target_x, target_y, world_width, world_height):
         """Updates the camera position based on the target (player)."""
-        target_cam_x = target_x - self.screen_width / 2
-        target_cam_y = target_y - self.screen_height / 2
-        if world_width > self.screen_width:
-            self.camera_x = max(
-                0.0, min(target_cam_x, world_width - self.screen_width))
+        if (world_width, world_height) != self._camera_world:
+            self._set_camera_bounds(world_width, world_height)
+        max_x, max_y = self._camera_max_x, self._camera_max_y
+        if max_x is not None:
+            self.camera_x = max(0.0, min(target_x - self._half_screen_width, max_x))
         else:
-            self.camera_x = (world_width - self.screen_width) / 2
-        if world_height > self.screen_height:
-            self.camera_y = max(
-                0.0, min(target_cam_y, world_height - self.screen_height))
+            self.camera_x = self._camera_center_x
+        if max_y is not None:
+            self.camera_y = max(0.0, min(target_y - self._half_screen_height, max_y))
         else:
-            self.camera_y = (world_height - self.screen_height) / 2
+            self.camera_y = self._camera_center_y
+
+    def _render_tiles(self, surface, map_data, map_w, tx0, ty0, tx1, ty1):
+        """Blits tiles [tx0, tx1) x [ty0, ty1) onto surface, with (tx0, ty0) at its origin."""
+        ts = self.tile_size
+        lookup = self.tile_graphics.__getitem__
+        xs = range(0, (tx1-tx0)*ts, ts)  # Same destination columns for every row
+        blit_seq = []
+        for y in range(ty0, ty1):
+            row_start = y*map_w
+            py = (y-ty0)*ts
+            # One comprehension per row: tile ids -> surfaces via map(), paired with
+            # the precomputed x offsets, ids without a graphic dropped
+            blit_seq += [(tile_surf, (px, py))
+                         for tile_surf, px in zip(map(lookup, map_data[row_start+tx0:row_start+tx1]), xs)
+                         if tile_surf is not None]
+        surface.blits(blit_seq, doreturn=False)
+
+    def _build_map_surface(self, map_data, map_w, map_h):
+        """Pre-renders the static map to one Surface. Returns None if it would be too large."""
+        ts = self.tile_size
+        width, height = map_w*ts, map_h*ts
+        if width <= 0 or height <= 0 or width*height > MAP_PREBAKE_MAX_PIXELS:
+            return None
+        surface = pygame.Surface((width, height)).convert()
+        surface.fill(BACKGROUND_COLOR)  # Shows through unknown tile ids, as before
+        self._render_tiles(surface, map_data, map_w, 0, 0, map_w, map_h)
+        print(f"Renderer: Pre-rendered map surface {width}x{height}px")
+        return surface
+
+    def _get_map_chunk(self, map_data, map_w, map_h, chunk_x, chunk_y):
+        """Returns the pre-rendered chunk at (chunk_x, chunk_y), building it on first use."""
+        chunks = self._map_chunks
+        key = (chunk_x, chunk_y)
+        surface = chunks.get(key)
+        if surface is None:
+            tx0, ty0 = chunk_x*MAP_CHUNK_TILES, chunk_y*MAP_CHUNK_TILES
+            tx1 = min(map_w, tx0+MAP_CHUNK_TILES)
+            ty1 = min(map_h, ty0+MAP_CHUNK_TILES)
+            ts = self.tile_size
+            surface = pygame.Surface(((tx1-tx0)*ts, (ty1-ty0)*ts)).convert()
+            surface.fill(BACKGROUND_COLOR)
+            self._render_tiles(surface, map_data, map_w, tx0, ty0, tx1, ty1)
+            chunks[key] = surface
+            if len(chunks) > MAP_CHUNK_CACHE_SIZE:
+                chunks.popitem(last=False)  # Evict least recently used
+        else:
+            chunks.move_to_end(key)
+        return surface
 
     def draw_map(self, map_data, map_w, map_h, tile_size):
-        """Draws the visible portion of the map."""
+        """Draws the background and the visible portion of the map."""
         if not map_data or tile_size <= 0:
+            self.screen.fill(BACKGROUND_COLOR)
             return
         if self.tile_size != tile_size:
             self.tile_size = tile_size  # Update size if needed
+        # Map surfaces are opaque (tiles without a graphic show the background
+        # they were pre-filled with), so clearing the screen is only needed when
+        # the view extends past the map's edges
+        cam_x, cam_y = self.camera_x, self.camera_y
+        if not (0 <= cam_x and cam_x + self.screen_width <= map_w*self.tile_size
+                and 0 <= cam_y and cam_y + self.screen_height <= map_h*self.tile_size):
+            self.screen.fill(BACKGROUND_COLOR)
 
-        buffer = 1
-        stx = max(0, int(self.camera_x/self.tile_size)-buffer)
-        etx = min(map_w, int(
-            (self.camera_x+self.screen_width)/self.tile_size)+buffer+1)
-        sty = max(0, int(self.camera_y/self.tile_size)-buffer)
-        ety = min(map_h, int(
-            (self.camera_y+self.screen_height)/self.tile_size)+buffer+1)
+        if self._map_surface_source is not map_data or self._map_surface_tile_size != self.tile_size:
+            self.map_surface = self._build_map_surface(map_data, map_w, map_h)
+            self._map_chunks.clear()
+            self._map_surface_source = map_data
+            self._map_surface_tile_size = self.tile_size
+        if self.map_surface is not None:
+            # SDL clips to the screen, so only the visible region is copied
+            self.screen.blit(self.map_surface, (-self.camera_x, -self.camera_y))
+            return
 
-        for y in range(sty, ety):
-            if y >= len(map_data):
-                continue
-            for x in range(stx, etx):
-                if x >= len(map_data[y]):
-                    continue
-                tid = map_data[y][x]
-                if tid in self.tile_graphics:
-                    self.screen.blit(
-                        self.tile_graphics[tid], (x*self.tile_size-self.camera_x, y*self.tile_size-self.camera_y))
-
-    def draw_players(self, player_map, player_colors, my_player_id):
-        """Draws the players and their usernames."""
-        if not player_map or not self.player_rect:
+        # Map too large to pre-render whole: draw the visible chunks, each built
+        # once and kept in a small LRU cache, in one blits() call
+        chunk_px = MAP_CHUNK_TILES*self.tile_size
+        cx, cy = int(self.camera_x), int(self.camera_y)
+        first_x, first_y = max(0, cx//chunk_px), max(0, cy//chunk_px)
+        last_x = min(-(-map_w//MAP_CHUNK_TILES), (cx+self.screen_width-1)//chunk_px+1)
+        last_y = min(-(-map_h//MAP_CHUNK_TILES), (cy+self.screen_height-1)//chunk_px+1)
+        blit_seq = []
+        for chunk_y in range(first_y, last_y):
+            for chunk_x in range(first_x, last_x):
+                surface = self._get_map_chunk(map_data, map_w, map_h, chunk_x, chunk_y)
+                blit_seq.append((surface, (chunk_x*chunk_px-cx, chunk_y*chunk_px-cy)))
+        self.screen.blits(blit_seq, doreturn=False)
+
+    @staticmethod
+    def _to_display_format(surf):
+        """Copies surf into the display pixel format, dropping alpha when it is fully opaque."""
+        width, height = surf.get_size()
+        if pygame.mask.from_surface(surf, 254).count() == width * height:
+            return surf.convert()
+        return surf.convert_alpha()
+
+    def _get_tint(self, color, size):
+        """Returns the shared half-alpha overlay of color for frames of size."""
+        key = (color, size)
+        tisurf = self._tint_cache.get(key)
+        if tisurf is None:
+            tisurf = pygame.Surface(size, pygame.SRCALPHA)
+            tisurf.fill(color+(128,))
+            self._tint_cache[key] = tisurf
+        return tisurf
+
+    def _tint_frame(self, frame, color):
+        """Returns a copy of frame multiplied by color at half alpha."""
+        tsurf = frame.copy()
+        tsurf.blit(self._get_tint(color, frame.get_size()), (0, 0),
+                   special_flags=pygame.BLEND_RGBA_MULT)
+        return tsurf.convert_alpha()
+
+    def _pretint_frames(self):
+        """Tints every directional frame for each palette color once, at load time."""
+        tinted_by_frame = {}  # IDLE/UNKNOWN alias RUNNING_DOWN; tint that frame once
+        for color in AVAILABLE_COLORS:
+            for state, frame in self.directional_frames.items():
+                frame_key = (id(frame), color)
+                if frame_key not in tinted_by_frame:
+                    tinted_by_frame[frame_key] = self._tint_frame(frame, color)
+                self._tinted_cache[(state, color)] = tinted_by_frame[frame_key]
+
+    def _get_tinted_frame(self, state, color):
+        """Returns the sprite for state tinted with color, building it if not pre-tinted."""
+        key = (state, color)
+        tsurf = self._tinted_cache.get(key)
+        if tsurf is None:
+            tsurf = self._tint_frame(self.directional_frames.get(
+                state, self.directional_frames[game_pb2.AnimationState.IDLE]), color)
+            self._tinted_cache[key] = tsurf
+        return tsurf
+
+    def _render_username(self, username):
+        """Renders a username and caches it, evicting the least recently used past the cap."""
+        cache = self._username_cache
+        usurf = self.username_font.render(
+            username, True, self.username_color).convert_alpha()
+        # Offset from the sprite's top-left: centered, 2px above the sprite
+        entry = (usurf, FRAME_WIDTH//2 - usurf.get_width()//2,
+                 -2 - usurf.get_height())
+        cache[username] = entry
+        if len(cache) > USERNAME_CACHE_SIZE:
+            cache.popitem(last=False)  # Evict least recently used
+        return entry
+
+    def draw_players(self, player_arrays, my_player_id):
+        """Draws the players and their usernames from the parallel player lists."""
+        ids, xs, ys, states, usernames, colors, prev_xs, prev_ys, t_prevs, t_nexts = player_arrays
+        self.animating = False
+        if not ids or not self.player_rect:
             return
 
-        for pid, player in player_map.items():
-            state = player.current_animation_state
-            surf = self.directional_frames.get(
-                state, self.directional_frames[game_pb2.AnimationState.IDLE])
-            if surf:
-                sx = player.x_pos-self.camera_x
-                sy = player.y_pos-self.camera_y
-                prect = surf.get_rect(center=(int(sx), int(sy)))
-
-                # Tinting
-                tsurf = surf.copy()
-                color = player_colors.get(pid, (255, 255, 255))
-                tisurf = pygame.Surface(prect.size, pygame.SRCALPHA)
-                tisurf.fill(color+(128,))
-                tsurf.blit(tisurf, (0, 0),
-                           special_flags=pygame.BLEND_RGBA_MULT)
-                self.screen.blit(tsurf, prect)
+        tinted_cache = self._tinted_cache
+        username_cache = self._username_cache
+        touch_username = username_cache.move_to_end
+        cam_x, cam_y = self.camera_x, self.camera_y
+        max_sx = self.screen_width+FRAME_WIDTH
+        max_sy = self.screen_height+FRAME_HEIGHT
+        half_w = FRAME_WIDTH//2
+        half_h = FRAME_HEIGHT//2
+        now = time.monotonic()
+        sprite_blits = []
+        name_blits = []
+        own_rect = None
+        gliding = False
+        for pid, x_pos, y_pos, state, username, color, px, py, t_prev, t_next in zip(
+                ids, xs, ys, states, usernames, colors, prev_xs, prev_ys, t_prevs, t_nexts):
+            if pid is None:
+                continue  # Free slot
+            if now < t_next:
+                # Still gliding towards the latest server position
+                gliding = True
+                alpha = max(0.0, (now - t_prev) / (t_next - t_prev))
+                x_pos = px + (x_pos - px) * alpha
+                y_pos = py + (y_pos - py) * alpha
+            sx = x_pos-cam_x
+            sy = y_pos-cam_y
+            # Off screen (one frame of margin covers the sprite and its name)
+            if not (-FRAME_WIDTH < sx < max_sx and -FRAME_HEIGHT < sy < max_sy):
+                continue
+            tsurf = tinted_cache.get((state, color)) or self._get_tinted_frame(state, color)
+            if tsurf:
+                # Every frame is FRAME_WIDTH x FRAME_HEIGHT, so place it by
+                # its top-left directly instead of building a centered Rect
+                bx = int(sx) - half_w
+                by = int(sy) - half_h
+                sprite_blits.append((tsurf, (bx, by)))
 
                 # Player Username (above sprite)
-                if player.username:
-                    usurf = self.username_font.render(
-                        player.username, True, self.username_color)
-                    urect = usurf.get_rect(
-                        centerx=prect.centerx, bottom=prect.top-2)
-                    self.screen.blit(usurf, urect)
+                if username:
+                    entry = username_cache.get(username)
+                    if entry is None:
+                        entry = self._render_username(username)
+                    else:
+                        touch_username(username)  # Keep visible names from being evicted
+                    usurf, ux, uy = entry
+                    name_blits.append((usurf, (bx + ux, by + uy)))
 
                 # Highlight own player
                 if pid == my_player_id:
-                    pygame.draw.rect(
-                        self.screen, (255, 255, 255), prect.inflate(4, 4), 2)
+                    own_rect = (bx - 2, by - 2, FRAME_WIDTH + 4, FRAME_HEIGHT + 4)
+
+        self.animating = gliding
+        # Sprites, then names so no sprite covers a name, then the highlight
+        self.screen.blits(sprite_blits, doreturn=False)
+        self.screen.blits(name_blits, doreturn=False)
+        if own_rect is not None:
+            pygame.draw.rect(
+                self.screen, (255, 255, 255), own_rect, 2)
 
     def draw_error_message(self, message):
         """Draws an error message centered on the screen."""
@@ -366,25 +675,24 @@ class Renderer:
         """Renders the map and players. Returns False if an error was displayed."""
         error_msg = state_manager.get_connection_error()
         if error_msg:
+            self.animating = False
             self.screen.fill(BACKGROUND_COLOR)
             self.draw_error_message(error_msg)
             return False  # Error displayed
         else:
             # Get data needed for rendering
-            current_player_map = state_manager.get_state_snapshot_map()
+            player_arrays = state_manager.get_player_arrays()
             map_data, map_w, map_h, tile_size = state_manager.get_map_data()
             my_player_id = state_manager.get_my_player_id()
-            player_colors = state_manager.get_all_player_colors()
 
             # Update camera
-            my_player_snapshot = current_player_map.get(my_player_id)
-            if my_player_snapshot:
+            my_position = state_manager.get_player_position(my_player_id)
+            if my_position:
                 world_w, world_h = state_manager.get_world_dimensions()
-                self.update_camera(my_player_snapshot.x_pos,
-                                   my_player_snapshot.y_pos, world_w, world_h)
+                self.update_camera(my_position[0],
+                                   my_position[1], world_w, world_h)
 
-            # Draw elements
-            self.screen.fill(BACKGROUND_COLOR)
+            # Draw elements (draw_map clears whatever the map doesn't cover)
             self.draw_map(map_data, map_w, map_h, tile_size)
-            self.draw_players(current_player_map, player_colors, my_player_id)
+            self.draw_players(player_arrays, my_player_id)
             return True  # Render successful
@@ -15,6 +15,8 @@ import (
 
 	"google.golang.org/grpc"
 	"google.golang.org/grpc/codes"
+	_ "google.golang.org/grpc/encoding/gzip" // Accept gzip-compressed client streams
+	"google.golang.org/grpc/keepalive"
 	"google.golang.org/grpc/status"
 )
 
@@ -271,7 +273,10 @@ func main() { /* ... (no change needed here) ... */
 	if err != nil {
 		log.Fatalf("Listen failed: %v", err)
 	}
-	grpcServer := grpc.NewServer()
+	grpcServer := grpc.NewServer(grpc.KeepaliveEnforcementPolicy(keepalive.EnforcementPolicy{
+		MinTime:             10 * time.Second, // Clients ping every 20s
+		PermitWithoutStream: true,
+	}))
 	gServer, err := NewGameServer()
 	if err != nil {
 		log.Fatalf("Server creation failed: %v", err)